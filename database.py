@@ -9,7 +9,7 @@ from pymongo import MongoClient
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
-from typing import Union
+from typing import List, Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
@@ -43,13 +43,52 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     result = db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
-    """Get documents from collection"""
+def create_documents(collection_name: str, items: List[Union[BaseModel, dict]]):
+    """Insert many documents with timestamps in a single round-trip"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    if not items:
+        return []
+
+    now = datetime.now(timezone.utc)
+    docs = []
+    for data in items:
+        data_dict = data.model_dump() if isinstance(data, BaseModel) else data.copy()
+        data_dict['created_at'] = now
+        data_dict['updated_at'] = now
+        docs.append(data_dict)
+
+    result = db[collection_name].insert_many(docs, ordered=False)
+    return [str(_id) for _id in result.inserted_ids]
+
+def iter_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None, skip: int = 0):
+    """Lazily iterate documents from collection, optionally projected and paginated with skip/limit"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
     
-    cursor = db[collection_name].find(filter_dict or {})
+    cursor = db[collection_name].find(filter_dict or {}, projection)
+    # Pages are only stable with a deterministic order, so tie-break on _id
+    if skip or limit:
+        cursor = cursor.sort("_id", 1)
+    if skip:
+        cursor = cursor.skip(skip)
     if limit:
         cursor = cursor.limit(limit)
     
-    return list(cursor)
+    return cursor
+
+def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None, skip: int = 0):
+    """Get documents from collection, optionally projected and paginated with skip/limit"""
+    return list(iter_documents(collection_name, filter_dict, limit=limit, projection=projection, skip=skip))
+
+def count_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
+    """Count documents in collection; unfiltered counts use collection metadata"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    if not filter_dict:
+        return db[collection_name].estimated_document_count()
+    if limit:
+        return db[collection_name].count_documents(filter_dict, limit=limit)
+    return db[collection_name].count_documents(filter_dict)
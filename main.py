@@ -1,204 +1,303 @@
 import os
-from fastapi import FastAPI, HTTPException
+from threading import Lock
+from cachetools import TTLCache
+from fastapi import Body, FastAPI, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from bson import ObjectId
 
-from database import db, create_document, get_documents
-from schemas import Product, ProductCreate, User
+from database import db, count_documents, create_document, create_documents, iter_documents
+from schemas import PRODUCT_ENCODER, Product, ProductCreate, ProductMsg, User
 
-app = FastAPI(title="Swolez API", version="1.0.0")
+# Only fetch the fields exposed by ProductMsg; _id and timestamps stay in Mongo
+PRODUCT_PROJECTION = {"_id": 0, **{name: 1 for name in ProductMsg.__struct_fields__}}
+
+# Serialized /api/products bodies keyed by query params; cleared on every write.
+# Writes also bump the generation so a read that started before the write
+# doesn't store its stale body after the clear.
+_products_cache = TTLCache(maxsize=256, ttl=30)
+_products_cache_lock = Lock()
+_products_cache_generation = 0
+
+def _invalidate_products_cache():
+    global _products_cache_generation
+    with _products_cache_lock:
+        _products_cache_generation += 1
+        _products_cache.clear()
+
+# list_collection_names() result for /test, so health-check storms don't hit Mongo
+_collections_cache = TTLCache(maxsize=1, ttl=5)
+_collections_cache_lock = Lock()
+
+# Largest batch accepted by POST /api/products/batch, matching the list page cap
+PRODUCT_BATCH_LIMIT = 200
+
+# Filtered counts stop scanning past this many matches
+PRODUCT_COUNT_LIMIT = 10000
+
+app = FastAPI(title="Swolez API", version="1.0.0", default_response_class=ORJSONResponse)
+
+# Explicit allowlist: a wildcard origin is not valid together with credentials
+CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "https://app.swolez.com,http://localhost:3000").split(",")
+    if origin.strip()
+]
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def check_database():
+    """Fail fast at startup so routes don't have to check the connection per request."""
+    if db is None:
+        raise RuntimeError("Database not configured. Check DATABASE_URL and DATABASE_NAME environment variables.")
+    db.command("ping")
+
+@app.on_event("startup")
+def create_product_indexes():
+    """Index the equality filters used by list_products so they run as IXSCANs.
+
+    Each index ends with _id so the _id tie-break sort on paginated reads is
+    served by the index instead of an in-memory sort.
+    """
+    products = db["product"]
+    # Covers line, line+category, line+featured and line+category+featured filters
+    products.create_index([("line", 1), ("category", 1), ("featured", 1), ("_id", 1)])
+    # Category pages filter on category or category+featured without line
+    products.create_index([("category", 1), ("featured", 1), ("_id", 1)])
+    # Featured-only queries (landing page) can't use the compound prefix
+    products.create_index([("featured", 1), ("_id", 1)])
+
+    # Earlier versions of these indexes without _id are now redundant
+    existing = products.index_information()
+    for name in ("line_1_category_1_featured_1", "category_1_featured_1", "featured_1"):
+        if name in existing:
+            products.drop_index(name)
+
 @app.get("/")
 def read_root():
     return {"message": "Swolez backend running"}
 
 @app.get("/test")
 def test_database():
+    # check_database guarantees db is configured once the app is serving requests
     response = {
         "backend": "✅ Running",
-        "database": "❌ Not Available",
-        "database_url": None,
-        "database_name": None,
-        "connection_status": "Not Connected",
+        "database": "✅ Available",
+        "database_url": "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set",
+        "database_name": db.name,
+        "connection_status": "Connected",
         "collections": []
     }
     try:
-        if db is not None:
-            response["database"] = "✅ Available"
-            response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
-            response["database_name"] = db.name
-            response["connection_status"] = "Connected"
-            try:
-                collections = db.list_collection_names()
-                response["collections"] = collections[:10]
-                response["database"] = "✅ Connected & Working"
-            except Exception as e:
-                response["database"] = f"⚠️  Connected but Error: {str(e)[:80]}"
-        else:
-            response["database"] = "⚠️  Available but not initialized"
+        with _collections_cache_lock:
+            collections = _collections_cache.get(db.name)
+        if collections is None:
+            collections = db.list_collection_names()
+            with _collections_cache_lock:
+                _collections_cache[db.name] = collections
+        response["collections"] = collections[:10]
+        response["database"] = "✅ Connected & Working"
     except Exception as e:
-        response["database"] = f"❌ Error: {str(e)[:80]}"
+        response["database"] = f"⚠️  Connected but Error: {str(e)[:80]}"
     return response
 
 # ---------- Products Endpoints ----------
 
-@app.get("/api/products", response_model=List[Product])
-def list_products(line: Optional[str] = None, category: Optional[str] = None, featured: Optional[bool] = None):
-    """List products with optional filters by line (gymwear/streetwear), category, and featured."""
-    if db is None:
-        raise HTTPException(status_code=500, detail="Database not configured")
-
+def _product_query(line: Optional[str], category: Optional[str], featured: Optional[bool]) -> dict:
+    """Equality-only filter built in index-field order, so each filter set has one
+    canonical shape in Mongo's plan cache. Empty strings count as unset."""
     query = {}
-    if line:
-        query["line"] = line
-    if category:
-        query["category"] = category
-    if featured is not None:
-        query["featured"] = featured
-
-    docs = get_documents("product", query)
-
-    # Convert ObjectId to str and ensure defaults
-    results = []
-    for d in docs:
-        d.pop("_id", None)
-        # Casting to Product will validate/normalize
-        results.append(Product(**d))
-    return results
+    for field, value in (("line", line or None), ("category", category or None), ("featured", featured)):
+        if value is not None:
+            query[field] = value
+    return query
+
+# Documents come from our own collection, so they are built as ProductMsg structs
+# (no validation) and encoded with msgspec instead of going through response_model.
+@app.get("/api/products", responses={200: {"model": List[Product]}})
+def list_products(
+    line: Optional[str] = None,
+    category: Optional[str] = None,
+    featured: Optional[bool] = None,
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of products to return"),
+    offset: int = Query(0, ge=0, description="Number of products to skip"),
+):
+    """List products with optional filters by line (gymwear/streetwear), category, and featured, one page at a time."""
+    query = _product_query(line, category, featured)
+    cache_key = (tuple(query.items()), limit, offset)
+    with _products_cache_lock:
+        body = _products_cache.get(cache_key)
+        generation = _products_cache_generation
+    if body is not None:
+        return Response(content=body, media_type="application/json")
+
+    docs = iter_documents("product", query, limit=limit, projection=PRODUCT_PROJECTION, skip=offset)
+
+    # Consume the cursor directly so each raw document can be freed once it is
+    # turned into a ProductMsg (which fills in defaults for missing fields)
+    body = PRODUCT_ENCODER.encode([ProductMsg(**d) for d in docs])
+    with _products_cache_lock:
+        if generation == _products_cache_generation:
+            _products_cache[cache_key] = body
+    return Response(content=body, media_type="application/json")
+
+@app.get("/api/products/count")
+def count_products(line: Optional[str] = None, category: Optional[str] = None, featured: Optional[bool] = None):
+    """
+    Total products for pagination. Unfiltered counts are an O(1) metadata estimate.
+    Filtered counts stop at 10000; "capped" is true when the real total may be higher.
+    """
+    query = _product_query(line, category, featured)
+    count = count_documents("product", query, limit=PRODUCT_COUNT_LIMIT)
+    return {"count": count, "capped": bool(query) and count >= PRODUCT_COUNT_LIMIT}
 
 @app.post("/api/products", status_code=201)
 def create_product(payload: ProductCreate):
-    if db is None:
-        raise HTTPException(status_code=500, detail="Database not configured")
     prod_id = create_document("product", payload)
+    _invalidate_products_cache()
     return {"id": prod_id}
 
+@app.post("/api/products/batch", status_code=201)
+def create_products(payload: List[ProductCreate] = Body(..., min_length=1, max_length=PRODUCT_BATCH_LIMIT)):
+    """Create many products with one model_dump per item and a single insert_many."""
+    prod_ids = create_documents("product", payload)
+    _invalidate_products_cache()
+    return {"ids": prod_ids}
+
 # ---------- Simple Seed Endpoint (optional helper) ----------
 
 class SeedRequest(BaseModel):
     count: int = 6
 
+# Built and validated once at import; seed_products only slices it
+_SEED_SAMPLE = (
+    {
+        "title": "Swolez Power Tee",
+        "description": "Breathable performance tee with four-way stretch",
+        "price": 28.0,
+        "category": "tops",
+        "line": "gymwear",
+        "images": (
+            "https://images.unsplash.com/photo-1592878849127-30a153c9fd1f?auto=format&fit=crop&w=1200&q=60",
+        ),
+        "colors": ("black", "white", "charcoal"),
+        "sizes": ("S", "M", "L", "XL"),
+        "in_stock": True,
+        "featured": True,
+        "rating": 4.6,
+        "tags": ("tee", "gym", "stretch")
+    },
+    {
+        "title": "Swolez Street Hoodie",
+        "description": "Heavyweight fleece with minimalist embroidery",
+        "price": 64.0,
+        "category": "hoodies",
+        "line": "streetwear",
+        "images": (
+            "https://images.unsplash.com/photo-1548883354-7622d03aca9b?auto=format&fit=crop&w=1200&q=60",
+        ),
+        "colors": ("ash", "black", "forest"),
+        "sizes": ("M", "L", "XL", "XXL"),
+        "in_stock": True,
+        "featured": True,
+        "rating": 4.8,
+        "tags": ("hoodie", "street", "fleece")
+    },
+    {
+        "title": "Swolez Flex Joggers",
+        "description": "Tapered athletic fit with zip pockets",
+        "price": 49.0,
+        "category": "bottoms",
+        "line": "gymwear",
+        "images": (
+            "https://images.unsplash.com/photo-1559631688-59c1ff16398d?auto=format&fit=crop&w=1200&q=60",
+        ),
+        "colors": ("black", "navy"),
+        "sizes": ("S", "M", "L", "XL"),
+        "in_stock": True,
+        "featured": False,
+        "rating": 4.5,
+        "tags": ("joggers", "zip", "athletic")
+    },
+    {
+        "title": "Swolez Cargo Pants",
+        "description": "Relaxed cargo with reinforced knees",
+        "price": 59.0,
+        "category": "bottoms",
+        "line": "streetwear",
+        "images": (
+            "https://images.unsplash.com/photo-1539533018447-62fc810b90d9?auto=format&fit=crop&w=1200&q=60",
+        ),
+        "colors": ("khaki", "black"),
+        "sizes": ("S", "M", "L", "XL", "XXL"),
+        "in_stock": True,
+        "featured": False,
+        "rating": 4.4,
+        "tags": ("cargo", "street")
+    },
+    {
+        "title": "Swolez Lift Beanie",
+        "description": "Rib-knit beanie with woven label",
+        "price": 18.0,
+        "category": "accessories",
+        "line": "streetwear",
+        "images": (
+            "https://images.unsplash.com/photo-1516571137133-1be29e37143a?auto=format&fit=crop&w=1200&q=60",
+        ),
+        "colors": ("black", "oxblood"),
+        "sizes": (),
+        "in_stock": True,
+        "featured": False,
+        "rating": 4.2,
+        "tags": ("beanie", "winter")
+    },
+    {
+        "title": "Swolez Mesh Tank",
+        "description": "Ultra-light mesh for max airflow",
+        "price": 24.0,
+        "category": "tops",
+        "line": "gymwear",
+        "images": (
+            "https://images.unsplash.com/photo-1540573133985-87b6da6d54a9?auto=format&fit=crop&w=1200&q=60",
+        ),
+        "colors": ("white", "black"),
+        "sizes": ("S", "M", "L"),
+        "in_stock": True,
+        "featured": False,
+        "rating": 4.3,
+        "tags": ("tank", "mesh", "breathable")
+    }
+)
+
+_SEED_PRODUCTS = tuple(ProductCreate(**item) for item in _SEED_SAMPLE)
+
 @app.post("/api/seed")
 def seed_products(req: SeedRequest):
-    if db is None:
-        raise HTTPException(status_code=500, detail="Database not configured")
-
-    sample = [
-        {
-            "title": "Swolez Power Tee",
-            "description": "Breathable performance tee with four-way stretch",
-            "price": 28.0,
-            "category": "tops",
-            "line": "gymwear",
-            "images": [
-                "https://images.unsplash.com/photo-1592878849127-30a153c9fd1f?auto=format&fit=crop&w=1200&q=60"
-            ],
-            "colors": ["black", "white", "charcoal"],
-            "sizes": ["S", "M", "L", "XL"],
-            "in_stock": True,
-            "featured": True,
-            "rating": 4.6,
-            "tags": ["tee", "gym", "stretch"]
-        },
-        {
-            "title": "Swolez Street Hoodie",
-            "description": "Heavyweight fleece with minimalist embroidery",
-            "price": 64.0,
-            "category": "hoodies",
-            "line": "streetwear",
-            "images": [
-                "https://images.unsplash.com/photo-1548883354-7622d03aca9b?auto=format&fit=crop&w=1200&q=60"
-            ],
-            "colors": ["ash", "black", "forest"],
-            "sizes": ["M", "L", "XL", "XXL"],
-            "in_stock": True,
-            "featured": True,
-            "rating": 4.8,
-            "tags": ["hoodie", "street", "fleece"]
-        },
-        {
-            "title": "Swolez Flex Joggers",
-            "description": "Tapered athletic fit with zip pockets",
-            "price": 49.0,
-            "category": "bottoms",
-            "line": "gymwear",
-            "images": [
-                "https://images.unsplash.com/photo-1559631688-59c1ff16398d?auto=format&fit=crop&w=1200&q=60"
-            ],
-            "colors": ["black", "navy"],
-            "sizes": ["S", "M", "L", "XL"],
-            "in_stock": True,
-            "featured": False,
-            "rating": 4.5,
-            "tags": ["joggers", "zip", "athletic"]
-        },
-        {
-            "title": "Swolez Cargo Pants",
-            "description": "Relaxed cargo with reinforced knees",
-            "price": 59.0,
-            "category": "bottoms",
-            "line": "streetwear",
-            "images": [
-                "https://images.unsplash.com/photo-1539533018447-62fc810b90d9?auto=format&fit=crop&w=1200&q=60"
-            ],
-            "colors": ["khaki", "black"],
-            "sizes": ["S", "M", "L", "XL", "XXL"],
-            "in_stock": True,
-            "featured": False,
-            "rating": 4.4,
-            "tags": ["cargo", "street"]
-        },
-        {
-            "title": "Swolez Lift Beanie",
-            "description": "Rib-knit beanie with woven label",
-            "price": 18.0,
-            "category": "accessories",
-            "line": "streetwear",
-            "images": [
-                "https://images.unsplash.com/photo-1516571137133-1be29e37143a?auto=format&fit=crop&w=1200&q=60"
-            ],
-            "colors": ["black", "oxblood"],
-            "sizes": [],
-            "in_stock": True,
-            "featured": False,
-            "rating": 4.2,
-            "tags": ["beanie", "winter"]
-        },
-        {
-            "title": "Swolez Mesh Tank",
-            "description": "Ultra-light mesh for max airflow",
-            "price": 24.0,
-            "category": "tops",
-            "line": "gymwear",
-            "images": [
-                "https://images.unsplash.com/photo-1540573133985-87b6da6d54a9?auto=format&fit=crop&w=1200&q=60"
-            ],
-            "colors": ["white", "black"],
-            "sizes": ["S", "M", "L"],
-            "in_stock": True,
-            "featured": False,
-            "rating": 4.3,
-            "tags": ["tank", "mesh", "breathable"]
-        }
-    ]
-
-    created = 0
-    for item in sample[: req.count]:
-        create_document("product", item)
-        created += 1
-    return {"created": created}
+    inserted_ids = create_documents("product", _SEED_PRODUCTS[: req.count])
+    _invalidate_products_cache()
+    return {"created": len(inserted_ids)}
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+    # Access logs are off in production; set ACCESS_LOG=1 to turn them back on. Error logs are unaffected.
+    access_log = os.getenv("ACCESS_LOG", "0") == "1"
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+        access_log=access_log,
+    )
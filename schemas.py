@@ -11,6 +11,7 @@ Model name is converted to lowercase for the collection name:
 - BlogPost -> "blogs" collection
 """
 
+import msgspec
 from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional, List, Literal
 
@@ -43,6 +44,32 @@ class Product(BaseModel):
     rating: Optional[float] = Field(None, ge=0, le=5, description="Average rating")
     tags: List[str] = Field(default_factory=list, description="Searchable tags")
 
+class ProductMsg(msgspec.Struct, kw_only=True):
+    """
+    Read-path mirror of Product for documents already stored in Mongo.
+    Construction does no validation and URLs stay plain str.
+    """
+    title: str
+    description: Optional[str] = None
+    price: float
+    category: Literal["tops", "bottoms", "hoodies", "accessories"]
+    line: Literal["gymwear", "streetwear"]
+    images: List[str] = []
+    colors: List[str] = []
+    sizes: List[Literal["XS", "S", "M", "L", "XL", "XXL"]] = []
+    in_stock: bool = True
+    featured: bool = False
+    rating: Optional[float] = None
+    tags: List[str] = []
+
+# /api/products projects on ProductMsg's fields, so a field missing here would be
+# silently dropped from reads
+if set(ProductMsg.__struct_fields__) != set(Product.model_fields):
+    raise RuntimeError("ProductMsg fields must match Product fields")
+
+# Shared encoder for ProductMsg lists
+PRODUCT_ENCODER = msgspec.json.Encoder()
+
 # Lightweight model for creates where URLs might not be strict
 class ProductCreate(BaseModel):
     title: str